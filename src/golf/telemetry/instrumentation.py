@@ -2,29 +2,225 @@
 
 import asyncio
 import functools
+import inspect
+import itertools
+import json
+import operator
 import os
 import sys
+import threading
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Sequence
 from contextlib import asynccontextmanager
-from typing import TypeVar
-from collections import OrderedDict
+from typing import Any, TypeVar
+from collections import Counter, OrderedDict
+from queue import SimpleQueue
 
-from opentelemetry import baggage, trace
+from opentelemetry import baggage, context, trace
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace import (
+    ReadableSpan,
+    Span,
+    SpanProcessor,
+    TracerProvider,
+)
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF
 from opentelemetry.trace import Status, StatusCode
+from opentelemetry.util.re import parse_env_headers
+
+import requests
+from requests.adapters import HTTPAdapter
 
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
+try:
+    from golf.metrics import get_metrics_collector
+except ImportError:
+    # Metrics not available, instrumentation continues without metrics
+    get_metrics_collector = None
+
+try:
+    import orjson
+except ImportError:
+    # Fall back to the standard library for JSON attribute values
+    orjson = None
+
 T = TypeVar("T")
 
 # Global tracer instance
 _tracer: trace.Tracer | None = None
 _provider: TracerProvider | None = None
+# Set when the configured sampler drops every span (OTEL_TRACES_SAMPLER=always_off)
+_sampling_disabled = False
+# Provider created by telemetry_lifespan, shut down when its last session exits.
+# A provider initialized before the lifespan (generated servers do this so that
+# components get instrumented) is never shut down by it.
+_lifespan_provider: TracerProvider | None = None
+_lifespan_sessions = 0
+
+# Known MCP context attributes copied onto component spans
+_CTX_ATTRS = ("request_id", "session_id", "client_id", "user_id", "tenant_id")
+_CTX_ATTR_KEYS = tuple((attr, f"mcp.context.{attr}") for attr in _CTX_ATTRS)
+# Per context class: the known attributes the class defines, their span keys,
+# a getter for them and the remaining (attribute, key) pairs, which can only
+# come from the instance and are looked up on every call
+_ctx_getters: dict[
+    type,
+    tuple[
+        tuple[str, ...],
+        tuple[str, ...],
+        Callable | None,
+        tuple[tuple[str, str], ...],
+    ],
+] = {}
+
+# Bound once, read for every recorded component span
+_get_baggage = baggage.get_baggage
+
+# Sentinel for attribute lookups where None is a meaningful value
+_MISSING = object()
+
+# Span event names, only emitted for recording spans
+_TOOL_ERROR_EVENT = "tool.execution.error"
+_RESOURCE_ERROR_EVENT = "resource.read.error"
+_PROMPT_ERROR_EVENT = "prompt.generation.error"
+_HTTP_STARTED_EVENT = "http.request.started"
+_HTTP_COMPLETED_EVENT = "http.request.completed"
+_HTTP_ERROR_EVENT = "http.request.error"
+
+# Attribute values are capped at this length. Non-primitive values are recorded
+# by type name unless GOLF_TRACE_VALUE_PREVIEW=1 asks for a str() preview.
+_VALUE_PREVIEW = os.environ.get("GOLF_TRACE_VALUE_PREVIEW", "0") == "1"
+_VALUE_PREVIEW_MAX_LEN = 256
+
+# http.scheme/host/target already describe the request, the full URL (with its
+# query string) is only recorded when GOLF_TRACE_FULL_URL=1
+_TRACE_FULL_URL = os.environ.get("GOLF_TRACE_FULL_URL", "0") == "1"
+
+# HTTP span naming: operation type by path marker in order of precedence,
+# lowercase method names
+_HTTP_OPERATIONS = (("/mcp", "mcp.request"), ("/sse", "sse.stream"), ("/auth", "auth"))
+_HTTP_METHOD_NAMES = {
+    method: method.lower()
+    for method in ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        print(f"[WARNING] Ignoring invalid {name}={value!r}, using {default}")
+        return default
+    return parsed
+
+
+def _force_flush_all(targets: Sequence[Any], timeout_millis: int) -> bool:
+    """Flush every target, splitting one timeout budget between them."""
+    deadline_ns = time.monotonic_ns() + timeout_millis * 1_000_000
+    results = []
+    for target in targets:
+        remaining_ms = max(0, (deadline_ns - time.monotonic_ns()) // 1_000_000)
+        # Keep going after a failed flush, every target gets its chance
+        results.append(target.force_flush(remaining_ms))
+    return all(result is not False for result in results)
+
+
+class PooledSpanExporter(SpanExporter):
+    """Span exporter that lends one of several OTLP HTTP exporters per export.
+
+    Meant to be shared by several BatchSpanProcessors, each taking a reference
+    with share(). Each export checks out an idle exporter, so at most ``size``
+    exports run at once and the others wait. All exporters share one HTTP
+    session whose connection pool is sized for the number of exporters.
+    """
+
+    def __init__(self, size: int, **exporter_kwargs: Any) -> None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size * 4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        self._pool = [
+            OTLPSpanExporter(session=session, **exporter_kwargs) for _ in range(size)
+        ]
+        # Idle exporters, taken in turn so exports rotate across the pool
+        self._idle: SimpleQueue[OTLPSpanExporter] = SimpleQueue()
+        for exporter in self._pool:
+            self._idle.put(exporter)
+        self._users = 0
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def share(self) -> "PooledSpanExporter":
+        """Register another processor using the pool and return the pool."""
+        with self._lock:
+            self._users += 1
+        return self
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        exporter = self._idle.get()
+        try:
+            return exporter.export(spans)
+        finally:
+            self._idle.put(exporter)
+
+    def shutdown(self) -> None:
+        # Every processor sharing the pool shuts it down after flushing its own
+        # queue, close the exporters only once the last of them is done
+        with self._lock:
+            self._users -= 1
+            if self._users > 0 or self._shutdown:
+                return
+            self._shutdown = True
+        for exporter in self._pool:
+            exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return _force_flush_all(self._pool, timeout_millis)
+
+
+class RoundRobinSpanProcessor(SpanProcessor):
+    """Hand each finished span to exactly one of several span processors.
+
+    Used to run several BatchSpanProcessors side by side so exports happen
+    on multiple worker threads instead of a single one.
+    """
+
+    def __init__(self, processors: Sequence[SpanProcessor]) -> None:
+        self._processors = tuple(processors)
+        self._counter = itertools.count()
+
+    def on_start(
+        self, span: Span, parent_context: context.Context | None = None
+    ) -> None:
+        # BatchSpanProcessor does nothing on start, so there is nothing to route
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        processors = self._processors
+        processors[next(self._counter) % len(processors)].on_end(span)
+
+    def shutdown(self) -> None:
+        for processor in self._processors:
+            processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return _force_flush_all(self._processors, timeout_millis)
 
 
 def init_telemetry(service_name: str = "golf-mcp-server") -> TracerProvider | None:
@@ -32,7 +228,11 @@ def init_telemetry(service_name: str = "golf-mcp-server") -> TracerProvider | No
 
     Returns None if required environment variables are not set.
     """
-    global _provider
+    global _tracer, _provider, _sampling_disabled
+
+    # Already initialized (repeated calls in tests or on dev reload)
+    if _provider is not None:
+        return _provider
 
     # Check for Golf platform integration first
     golf_api_key = os.environ.get("GOLF_API_KEY")
@@ -99,40 +299,68 @@ def init_telemetry(service_name: str = "golf-mcp-server") -> TracerProvider | No
             )
             headers = os.environ.get("OTEL_EXPORTER_OTLP_HEADERS", "")
 
-            # Parse headers if provided
-            header_dict = {}
-            if headers:
-                for header in headers.split(","):
-                    if "=" in header:
-                        key, value = header.split("=", 1)
-                        header_dict[key.strip()] = value.strip()
-
-            exporter = OTLPSpanExporter(
-                endpoint=endpoint, headers=header_dict if header_dict else None
+            # Parse headers if provided, using the OTel spec's URL-encoded format
+            # while still accepting plain name=value pairs
+            header_dict = parse_env_headers(headers, liberal=True) if headers else {}
+
+            exporter_kwargs = {
+                "endpoint": endpoint,
+                "headers": header_dict if header_dict else None,
+            }
+
+            # Bound concurrent exports from all workers by a shared pool of
+            # exporters, otherwise each worker gets an exporter of its own
+            pool_size = _env_int("GOLF_OTLP_POOL_SIZE", 1)
+            pooled_exporter = (
+                PooledSpanExporter(pool_size, **exporter_kwargs)
+                if pool_size > 1
+                else None
             )
 
+            def make_exporter() -> SpanExporter:
+                if pooled_exporter is not None:
+                    return pooled_exporter.share()
+                return OTLPSpanExporter(**exporter_kwargs)
+
             # Log successful configuration for Golf platform
             if golf_api_key:
                 print(f"[INFO] OpenTelemetry configured for Golf platform: {endpoint}")
         else:
             # Default to console exporter
-            exporter = ConsoleSpanExporter(out=sys.stderr)
+            def make_exporter() -> SpanExporter:
+                return ConsoleSpanExporter(out=sys.stderr)
+
     except Exception:
         import traceback
 
         traceback.print_exc()
         raise
 
-    # Add batch processor for better performance
+    # Add batch processors for better performance. A larger queue absorbs bursts
+    # at the cost of memory, and a shorter schedule delay trades more export
+    # requests for fresher data. Each worker is a BatchSpanProcessor with its
+    # own export thread, exporting through its own exporter or the shared pool.
     try:
-        processor = BatchSpanProcessor(
-            exporter,
-            max_queue_size=2048,
-            schedule_delay_millis=1000,  # Export every 1 second instead of default 5 seconds
-            max_export_batch_size=512,
-            export_timeout_millis=5000,
-        )
-        provider.add_span_processor(processor)
+        queue_size = _env_int("GOLF_OTEL_QUEUE_SIZE", 16384)
+        batch_size = _env_int("GOLF_OTEL_BATCH_SIZE", 1024)
+        schedule_ms = _env_int("GOLF_OTEL_SCHEDULE_MS", 500)
+        export_timeout_ms = _env_int("GOLF_OTEL_EXPORT_TIMEOUT_MS", 10000)
+        workers = _env_int("GOLF_OTEL_WORKERS", 2)
+
+        processors = [
+            BatchSpanProcessor(
+                make_exporter(),
+                max_queue_size=queue_size,
+                schedule_delay_millis=schedule_ms,
+                max_export_batch_size=min(batch_size, queue_size),
+                export_timeout_millis=export_timeout_ms,
+            )
+            for _ in range(workers)
+        ]
+        if len(processors) > 1:
+            provider.add_span_processor(RoundRobinSpanProcessor(processors))
+        else:
+            provider.add_span_processor(processors[0])
     except Exception:
         import traceback
 
@@ -150,6 +378,10 @@ def init_telemetry(service_name: str = "golf-mcp-server") -> TracerProvider | No
             # Only set if no provider exists or it's the default proxy provider
             trace.set_tracer_provider(provider)
         _provider = provider
+        # Resolve the component tracer once so instrumenting doesn't look it up
+        _tracer = provider.get_tracer("golf.mcp.components", "1.0.0")
+        # The SDK resolves OTEL_TRACES_SAMPLER into the provider's sampler
+        _sampling_disabled = provider.sampler is ALWAYS_OFF
     except Exception:
         import traceback
 
@@ -172,737 +404,750 @@ def get_tracer() -> trace.Tracer:
     return _tracer
 
 
-def instrument_tool(func: Callable[..., T], tool_name: str) -> Callable[..., T]:
-    """Instrument a tool function with OpenTelemetry tracing."""
-    global _provider
+def _metrics_enabled() -> bool:
+    """Return True if a metrics collector is available and enabled."""
+    return get_metrics_collector is not None and get_metrics_collector().enabled
 
-    # If telemetry is disabled, return the original function
-    if _provider is None:
-        return func
 
-    tracer = get_tracer()
+def _record_tool_metrics(
+    tool_name: str, start_ns: int, error: Exception | None = None
+) -> None:
+    """Record execution metrics for a tool call, if metrics are available."""
+    if get_metrics_collector is None:
+        return
 
-    @functools.wraps(func)
-    async def async_wrapper(*args, **kwargs):
-        # Record metrics timing
-        import time
+    metrics_collector = get_metrics_collector()
+    if error is None:
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
+        metrics_collector.increment_tool_execution(tool_name, "success")
+        metrics_collector.record_tool_duration(tool_name, duration)
+    else:
+        metrics_collector.increment_tool_execution(tool_name, "error")
+        metrics_collector.increment_error("tool", type(error).__name__)
 
-        start_time = time.time()
 
-        # Create a more descriptive span name
-        span_name = f"mcp.tool.{tool_name}.execute"
+class _NullMetrics:
+    """No-op stand-in for the metrics collector when golf.metrics is missing."""
 
-        # start_as_current_span automatically uses the current context and manages it
-        with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive attributes
-            span.set_attribute("mcp.component.type", "tool")
-            span.set_attribute("mcp.component.name", tool_name)
-            span.set_attribute("mcp.tool.name", tool_name)
-            span.set_attribute("mcp.tool.function", func.__name__)
-            span.set_attribute(
-                "mcp.tool.module",
-                func.__module__ if hasattr(func, "__module__") else "unknown",
-            )
+    def increment_session(self) -> None:
+        pass
 
-            # Add execution context
-            span.set_attribute("mcp.execution.args_count", len(args))
-            span.set_attribute("mcp.execution.kwargs_count", len(kwargs))
-            span.set_attribute("mcp.execution.async", True)
-
-            # Extract Context parameter if present
-            ctx = kwargs.get("ctx")
-            if ctx:
-                # Only extract known MCP context attributes
-                ctx_attrs = [
-                    "request_id",
-                    "session_id",
-                    "client_id",
-                    "user_id",
-                    "tenant_id",
-                ]
-                for attr in ctx_attrs:
-                    if hasattr(ctx, attr):
-                        value = getattr(ctx, attr)
-                        if value is not None:
-                            span.set_attribute(f"mcp.context.{attr}", str(value))
-
-            # Also check baggage for session ID
-            session_id_from_baggage = baggage.get_baggage("mcp.session.id")
-            if session_id_from_baggage:
-                span.set_attribute("mcp.session.id", session_id_from_baggage)
-
-            # Add event for tool execution start
-            span.add_event("tool.execution.started", {"tool.name": tool_name})
+    def record_session_duration(self, duration: float) -> None:
+        pass
 
-            try:
-                result = await func(*args, **kwargs)
-                span.set_status(Status(StatusCode.OK))
+    def increment_http_request(self, method: str, status_code: int, path: str) -> None:
+        pass
 
-                # Add event for successful completion
-                span.add_event("tool.execution.completed", {"tool.name": tool_name})
+    def record_http_duration(self, method: str, path: str, duration: float) -> None:
+        pass
 
-                # Record metrics for successful execution
-                try:
-                    from golf.metrics import get_metrics_collector
+    def increment_error(self, component_type: str, error_type: str) -> None:
+        pass
 
-                    metrics_collector = get_metrics_collector()
-                    metrics_collector.increment_tool_execution(tool_name, "success")
-                    metrics_collector.record_tool_duration(
-                        tool_name, time.time() - start_time
-                    )
-                except ImportError:
-                    # Metrics not available, continue without metrics
-                    pass
-
-                # Capture result metadata with better structure
-                if result is not None:
-                    if isinstance(result, str | int | float | bool):
-                        span.set_attribute("mcp.tool.result.value", str(result))
-                        span.set_attribute(
-                            "mcp.tool.result.type", type(result).__name__
-                        )
-                    elif isinstance(result, list):
-                        span.set_attribute("mcp.tool.result.count", len(result))
-                        span.set_attribute("mcp.tool.result.type", "array")
-                    elif isinstance(result, dict):
-                        span.set_attribute("mcp.tool.result.count", len(result))
-                        span.set_attribute("mcp.tool.result.type", "object")
-                        # Only show first few keys to avoid exceeding attribute limits
-                        if len(result) > 0 and len(result) <= 5:
-                            keys_list = list(result.keys())[:5]
-                            # Limit key length and join
-                            truncated_keys = [
-                                str(k)[:20] + "..." if len(str(k)) > 20 else str(k)
-                                for k in keys_list
-                            ]
-                            span.set_attribute(
-                                "mcp.tool.result.sample_keys", ",".join(truncated_keys)
-                            )
-                    elif hasattr(result, "__len__"):
-                        span.set_attribute("mcp.tool.result.length", len(result))
-
-                    # For any result, record its type
-                    span.set_attribute("mcp.tool.result.class", type(result).__name__)
 
-                return result
-            except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "tool.execution.error",
-                    {
-                        "tool.name": tool_name,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
+_NULL_METRICS = _NullMetrics()
 
-                # Record metrics for failed execution
-                try:
-                    from golf.metrics import get_metrics_collector
 
-                    metrics_collector = get_metrics_collector()
-                    metrics_collector.increment_tool_execution(tool_name, "error")
-                    metrics_collector.increment_error("tool", type(e).__name__)
-                except ImportError:
-                    # Metrics not available, continue without metrics
-                    pass
+def _get_metrics() -> Any:
+    """Return the metrics collector, or a no-op one if metrics aren't available."""
+    if get_metrics_collector is None:
+        return _NULL_METRICS
+    return get_metrics_collector()
 
-                raise
 
-    @functools.wraps(func)
-    def sync_wrapper(*args, **kwargs):
-        # Record metrics timing
-        import time
+# Request-path metric updates, applied in batches by a single worker task that
+# runs while any lifespan session is active
+_METRICS_QUEUE_SIZE = 8192
+_METRICS_BATCH_SIZE = 256
+_metrics_queue: asyncio.Queue | None = None
+_metrics_task: asyncio.Task | None = None
+# Collector methods that already failed, warned about once each
+_failed_metrics: set[str] = set()
 
-        start_time = time.time()
 
-        # Create a more descriptive span name
-        span_name = f"mcp.tool.{tool_name}.execute"
+def _queue_metric(name: str, *args: Any) -> None:
+    """Call a metrics collector method, deferred to the metrics worker if running."""
+    if _metrics_queue is None:
+        getattr(_get_metrics(), name)(*args)
+        return
+    try:
+        _metrics_queue.put_nowait((name, args))
+    except asyncio.QueueFull:
+        # Drop the update rather than hold up the request
+        pass
 
-        # start_as_current_span automatically uses the current context and manages it
-        with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive attributes
-            span.set_attribute("mcp.component.type", "tool")
-            span.set_attribute("mcp.component.name", tool_name)
-            span.set_attribute("mcp.tool.name", tool_name)
-            span.set_attribute("mcp.tool.function", func.__name__)
-            span.set_attribute(
-                "mcp.tool.module",
-                func.__module__ if hasattr(func, "__module__") else "unknown",
-            )
 
-            # Add execution context
-            span.set_attribute("mcp.execution.args_count", len(args))
-            span.set_attribute("mcp.execution.kwargs_count", len(kwargs))
-            span.set_attribute("mcp.execution.async", False)
-
-            # Extract Context parameter if present
-            ctx = kwargs.get("ctx")
-            if ctx:
-                # Only extract known MCP context attributes
-                ctx_attrs = [
-                    "request_id",
-                    "session_id",
-                    "client_id",
-                    "user_id",
-                    "tenant_id",
-                ]
-                for attr in ctx_attrs:
-                    if hasattr(ctx, attr):
-                        value = getattr(ctx, attr)
-                        if value is not None:
-                            span.set_attribute(f"mcp.context.{attr}", str(value))
-
-            # Also check baggage for session ID
-            session_id_from_baggage = baggage.get_baggage("mcp.session.id")
-            if session_id_from_baggage:
-                span.set_attribute("mcp.session.id", session_id_from_baggage)
-
-            # Add event for tool execution start
-            span.add_event("tool.execution.started", {"tool.name": tool_name})
+def _apply_metrics(batch: list[tuple[str, tuple]]) -> None:
+    """Apply queued metrics collector calls."""
+    metrics_collector = _get_metrics()
+    for name, args in batch:
+        try:
+            getattr(metrics_collector, name)(*args)
+        except Exception as e:
+            # A failing update must not stop the worker
+            if name not in _failed_metrics:
+                _failed_metrics.add(name)
+                print(f"[WARNING] Metrics update {name} failed: {e!r}")
+
+
+async def _metrics_worker(queue: asyncio.Queue) -> None:
+    """Drain queued metric updates in batches until cancelled."""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < _METRICS_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        _apply_metrics(batch)
+
+
+def _start_metrics_worker() -> None:
+    """Start the metrics worker unless it is already running."""
+    global _metrics_queue, _metrics_task
+
+    if _metrics_task is None and _metrics_enabled():
+        _metrics_queue = asyncio.Queue(maxsize=_METRICS_QUEUE_SIZE)
+        _metrics_task = asyncio.create_task(_metrics_worker(_metrics_queue))
 
+
+async def _stop_metrics_worker() -> None:
+    """Stop the metrics worker and apply whatever it hadn't processed yet."""
+    global _metrics_queue, _metrics_task
+
+    queue, task = _metrics_queue, _metrics_task
+    if task is None:
+        return
+    _metrics_queue = None
+    _metrics_task = None
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    remaining = []
+    while not queue.empty():
+        remaining.append(queue.get_nowait())
+    _apply_metrics(remaining)
+
+
+def _attr_value(value: Any) -> str | int | float | bool:
+    """Convert a value for a span attribute without unbounded stringification."""
+    if isinstance(value, str):
+        return value[:_VALUE_PREVIEW_MAX_LEN]
+    if isinstance(value, (int, float, bool)):
+        return value
+    if _VALUE_PREVIEW:
+        return str(value)[:_VALUE_PREVIEW_MAX_LEN]
+    return type(value).__name__
+
+
+def _ctx_getter(ctx: Any) -> tuple[
+    tuple[str, ...],
+    tuple[str, ...],
+    Callable | None,
+    tuple[tuple[str, str], ...],
+]:
+    """Return the context attributes ctx's class defines, a getter and the rest."""
+    ctx_type = type(ctx)
+    entry = _ctx_getters.get(ctx_type)
+    if entry is None:
+        # Only class-level attributes (e.g. properties) hold for every instance
+        present = [(a, k) for a, k in _CTX_ATTR_KEYS if hasattr(ctx_type, a)]
+        names = tuple(attr for attr, _ in present)
+        keys = tuple(key for _, key in present)
+        getter = operator.attrgetter(*names) if names else None
+        instance_attrs = tuple(
+            (attr, key) for attr, key in _CTX_ATTR_KEYS if (attr, key) not in present
+        )
+        entry = _ctx_getters[ctx_type] = (names, keys, getter, instance_attrs)
+    return entry
+
+
+def _extract_ctx(attrs: dict[str, Any], kwargs: dict[str, Any]) -> None:
+    """Add MCP context and baggage attributes to a span attribute dict."""
+    # Extract Context parameter if present
+    ctx = kwargs.get("ctx")
+    if ctx:
+        # Only extract known MCP context attributes
+        names, keys, getter, instance_attrs = _ctx_getter(ctx)
+        if getter is not None:
             try:
-                result = func(*args, **kwargs)
-                span.set_status(Status(StatusCode.OK))
+                values = getter(ctx)
+            except AttributeError:
+                # A class attribute such as a property can still raise
+                values = tuple(getattr(ctx, attr, None) for attr in names)
+            else:
+                if len(names) == 1:
+                    values = (values,)
+            for key, value in zip(keys, values):
+                if value is not None:
+                    attrs[key] = _attr_value(value)
+        for attr, key in instance_attrs:
+            value = getattr(ctx, attr, None)
+            if value is not None:
+                attrs[key] = _attr_value(value)
+
+    # Also check baggage for session ID
+    session_id_from_baggage = _get_baggage("mcp.session.id")
+    if session_id_from_baggage:
+        attrs["mcp.session.id"] = session_id_from_baggage
+
+
+def _set_common_attrs(
+    span: trace.Span,
+    static_attrs: dict[str, Any],
+    kwargs: dict[str, Any],
+    args: tuple | None = None,
+) -> None:
+    """Set component attributes plus context attributes in a single batch.
+
+    Argument counts are only recorded when ``args`` is given.
+    """
+    attrs = static_attrs.copy()
+    if args is not None:
+        attrs["mcp.execution.args_count"] = len(args)
+        attrs["mcp.execution.kwargs_count"] = len(kwargs)
+    _extract_ctx(attrs, kwargs)
+    span.set_attributes(attrs)
+
+
+def _scalar_result_attrs(result: Any) -> dict[str, Any]:
+    """Describe a str, number or bool tool result."""
+    result_type_name = type(result).__name__
+    return {
+        "mcp.tool.result.value": str(result)[:_VALUE_PREVIEW_MAX_LEN],
+        "mcp.tool.result.type": result_type_name,
+        "mcp.tool.result.class": result_type_name,
+    }
 
-                # Add event for successful completion
-                span.add_event("tool.execution.completed", {"tool.name": tool_name})
 
-                # Record metrics for successful execution
-                try:
-                    from golf.metrics import get_metrics_collector
+def _list_result_attrs(result: Any) -> dict[str, Any]:
+    """Describe a list tool result."""
+    return {
+        "mcp.tool.result.count": len(result),
+        "mcp.tool.result.type": "array",
+        "mcp.tool.result.class": type(result).__name__,
+    }
 
-                    metrics_collector = get_metrics_collector()
-                    metrics_collector.increment_tool_execution(tool_name, "success")
-                    metrics_collector.record_tool_duration(
-                        tool_name, time.time() - start_time
-                    )
-                except ImportError:
-                    # Metrics not available, continue without metrics
-                    pass
-
-                # Capture result metadata with better structure
-                if result is not None:
-                    if isinstance(result, str | int | float | bool):
-                        span.set_attribute("mcp.tool.result.value", str(result))
-                        span.set_attribute(
-                            "mcp.tool.result.type", type(result).__name__
-                        )
-                    elif isinstance(result, list):
-                        span.set_attribute("mcp.tool.result.count", len(result))
-                        span.set_attribute("mcp.tool.result.type", "array")
-                    elif isinstance(result, dict):
-                        span.set_attribute("mcp.tool.result.count", len(result))
-                        span.set_attribute("mcp.tool.result.type", "object")
-                        # Only show first few keys to avoid exceeding attribute limits
-                        if len(result) > 0 and len(result) <= 5:
-                            keys_list = list(result.keys())[:5]
-                            # Limit key length and join
-                            truncated_keys = [
-                                str(k)[:20] + "..." if len(str(k)) > 20 else str(k)
-                                for k in keys_list
-                            ]
-                            span.set_attribute(
-                                "mcp.tool.result.sample_keys", ",".join(truncated_keys)
-                            )
-                    elif hasattr(result, "__len__"):
-                        span.set_attribute("mcp.tool.result.length", len(result))
-
-                    # For any result, record its type
-                    span.set_attribute("mcp.tool.result.class", type(result).__name__)
 
-                return result
-            except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "tool.execution.error",
-                    {
-                        "tool.name": tool_name,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
+def _dict_result_attrs(result: Any) -> dict[str, Any]:
+    """Describe a dict tool result."""
+    result_attrs: dict[str, Any] = {
+        "mcp.tool.result.count": len(result),
+        "mcp.tool.result.type": "object",
+    }
+    # Only show first few keys to avoid exceeding attribute limits
+    if 0 < len(result) <= 5:
+        # Limit key length and join
+        result_attrs["mcp.tool.result.sample_keys"] = ",".join(
+            k if len(k) <= 20 else k[:20] + "..."
+            for k in map(str, itertools.islice(result, 5))
+        )
+    result_attrs["mcp.tool.result.class"] = type(result).__name__
+    return result_attrs
+
+
+def _sized_result_attrs(result: Any) -> dict[str, Any]:
+    """Describe a tool result that only has a length."""
+    return {
+        "mcp.tool.result.length": len(result),
+        "mcp.tool.result.class": type(result).__name__,
+    }
+
+
+# Tool result metadata builders keyed by exact result type
+_RESULT_META_HANDLERS: dict[type, Callable[[Any], dict[str, Any]]] = {
+    str: _scalar_result_attrs,
+    int: _scalar_result_attrs,
+    float: _scalar_result_attrs,
+    bool: _scalar_result_attrs,
+    dict: _dict_result_attrs,
+    list: _list_result_attrs,
+    bytes: _sized_result_attrs,
+}
+
+
+def _tool_result_attrs(result: Any) -> dict[str, Any]:
+    """Build span attributes describing a tool result."""
+    if result is None:
+        return {}
+
+    handler = _RESULT_META_HANDLERS.get(type(result))
+    if handler is not None:
+        return handler(result)
+
+    # Subclasses of the common types and everything else
+    if isinstance(result, (str, int, float, bool)):
+        return _scalar_result_attrs(result)
+    elif isinstance(result, list):
+        return _list_result_attrs(result)
+    elif isinstance(result, dict):
+        return _dict_result_attrs(result)
+    elif hasattr(result, "__len__"):
+        return _sized_result_attrs(result)
+
+    # For any result, record its type
+    return {"mcp.tool.result.class": type(result).__name__}
+
+
+def _resource_result_attrs(result: Any) -> dict[str, Any]:
+    """Build span attributes describing a resource result."""
+    result_attrs: dict[str, Any] = {}
+    if hasattr(result, "__len__"):
+        result_attrs["mcp.resource.result.size"] = len(result)
+
+    # Determine content type if possible
+    if isinstance(result, str):
+        result_attrs["mcp.resource.result.type"] = "text"
+        result_attrs["mcp.resource.result.length"] = len(result)
+    elif isinstance(result, bytes):
+        result_attrs["mcp.resource.result.type"] = "binary"
+        result_attrs["mcp.resource.result.size_bytes"] = len(result)
+    elif isinstance(result, dict):
+        result_attrs["mcp.resource.result.type"] = "object"
+        result_attrs["mcp.resource.result.keys_count"] = len(result)
+    elif isinstance(result, list):
+        result_attrs["mcp.resource.result.type"] = "array"
+        result_attrs["mcp.resource.result.items_count"] = len(result)
+    return result_attrs
+
+
+def _json_compact(value: Any) -> str:
+    """Serialize a value as compact JSON for use as a span attribute."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    # Match orjson, which writes non-ASCII characters as UTF-8
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _message_role(msg: Any) -> Any:
+    """Return a prompt message's role, or None if it has none."""
+    role = getattr(msg, "role", _MISSING)
+    if role is _MISSING:
+        return msg.get("role") if isinstance(msg, dict) else None
+    return role
+
+
+def _prompt_result_attrs(result: Any) -> dict[str, Any]:
+    """Build span attributes describing a prompt result."""
+    # Add message count and type information
+    if isinstance(result, list):
+        result_attrs = {
+            "mcp.prompt.result.message_count": len(result),
+            "mcp.prompt.result.type": "message_list",
+        }
+
+        # Analyze message types if they have role attributes
+        role_counts = Counter(map(_message_role, result))
+        role_counts.pop(None, None)
+
+        if role_counts:
+            result_attrs["mcp.prompt.result.roles"] = ",".join(role_counts)
+            result_attrs["mcp.prompt.result.role_counts"] = _json_compact(role_counts)
+        return result_attrs
+    elif isinstance(result, str):
+        return {
+            "mcp.prompt.result.type": "string",
+            "mcp.prompt.result.length": len(result),
+        }
+    return {"mcp.prompt.result.type": type(result).__name__}
+
+
+_RESULT_ATTRS_BUILDERS: dict[str, Callable[[Any], dict[str, Any]]] = {
+    "tool": _tool_result_attrs,
+    "resource": _resource_result_attrs,
+    "prompt": _prompt_result_attrs,
+}
+
+
+def _record_result_meta(span: trace.Span, result: Any, kind: str) -> None:
+    """Mark a component span successful and attach result metadata."""
+    span.set_status(Status(StatusCode.OK))
+    result_attrs = _RESULT_ATTRS_BUILDERS[kind](result)
+    if result_attrs:
+        span.set_attributes(result_attrs)
+
+
+def _record_error(
+    span: trace.Span,
+    error: Exception,
+    event_name: str,
+    event_attrs: dict[str, Any],
+) -> None:
+    """Record a component failure on its span."""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+    # Add event for error
+    span.add_event(
+        event_name,
+        {
+            **event_attrs,
+            "error.type": type(error).__name__,
+            "error.message": str(error),
+        },
+    )
+
+
+def instrument_tool(
+    func: Callable[..., T], tool_name: str, leaf: bool = False
+) -> Callable[..., T]:
+    """Instrument a tool function with OpenTelemetry tracing.
+
+    Sync tools marked as ``leaf`` don't call other instrumented components, so
+    their span is never made the current span.
+    """
+    global _provider
+
+    # If telemetry is disabled, return the original function. When the sampler
+    # drops every span the wrapper is only kept to record tool metrics.
+    if _provider is None or (_sampling_disabled and not _metrics_enabled()):
+        return func
+
+    tracer = _tracer
+
+    # Precompute values that stay the same for every call
+    is_coro = inspect.iscoroutinefunction(func)
+    span_name = f"mcp.tool.{tool_name}.execute"
+    error_event_attrs = {"tool.name": tool_name}
+    static_attrs = {
+        "mcp.component.type": "tool",
+        "mcp.component.name": tool_name,
+        "mcp.tool.name": tool_name,
+        "mcp.tool.function": func.__name__,
+        "mcp.tool.module": getattr(func, "__module__", "unknown"),
+        "mcp.execution.async": is_coro,
+    }
+
+    # Only build the wrapper matching the function type
+    if is_coro:
 
-                # Record metrics for failed execution
+        async def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return await func(*args, **kwargs)
+
+            # Record metrics timing
+            start_ns = time.perf_counter_ns()
+
+            # start_as_current_span uses the current context and manages it
+            with tracer.start_as_current_span(span_name) as span:
+                # Sampled-out spans discard attributes and events, skip building them
+                recording = span.is_recording()
+                if recording:
+                    _set_common_attrs(span, static_attrs, kwargs, args)
                 try:
-                    from golf.metrics import get_metrics_collector
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    if recording:
+                        _record_error(span, e, _TOOL_ERROR_EVENT, error_event_attrs)
+                    _record_tool_metrics(tool_name, start_ns, e)
+                    raise
+                _record_tool_metrics(tool_name, start_ns)
+                if recording:
+                    _record_result_meta(span, result, "tool")
+                return result
 
-                    metrics_collector = get_metrics_collector()
-                    metrics_collector.increment_tool_execution(tool_name, "error")
-                    metrics_collector.increment_error("tool", type(e).__name__)
-                except ImportError:
-                    # Metrics not available, continue without metrics
-                    pass
+    elif leaf:
 
-                raise
+        def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return func(*args, **kwargs)
+
+            # Record metrics timing
+            start_ns = time.perf_counter_ns()
+
+            # No child spans can follow, skip attaching the span to the context
+            span = tracer.start_span(span_name)
+            try:
+                # Sampled-out spans discard attributes and events, skip building them
+                recording = span.is_recording()
+                if recording:
+                    _set_common_attrs(span, static_attrs, kwargs, args)
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    if recording:
+                        _record_error(span, e, _TOOL_ERROR_EVENT, error_event_attrs)
+                    _record_tool_metrics(tool_name, start_ns, e)
+                    raise
+                _record_tool_metrics(tool_name, start_ns)
+                if recording:
+                    _record_result_meta(span, result, "tool")
+                return result
+            finally:
+                span.end()
 
-    # Return appropriate wrapper based on function type
-    if asyncio.iscoroutinefunction(func):
-        return async_wrapper
     else:
-        return sync_wrapper
+
+        def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return func(*args, **kwargs)
+
+            # Record metrics timing
+            start_ns = time.perf_counter_ns()
+
+            # start_as_current_span uses the current context and manages it
+            with tracer.start_as_current_span(span_name) as span:
+                # Sampled-out spans discard attributes and events, skip building them
+                recording = span.is_recording()
+                if recording:
+                    _set_common_attrs(span, static_attrs, kwargs, args)
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    if recording:
+                        _record_error(span, e, _TOOL_ERROR_EVENT, error_event_attrs)
+                    _record_tool_metrics(tool_name, start_ns, e)
+                    raise
+                _record_tool_metrics(tool_name, start_ns)
+                if recording:
+                    _record_result_meta(span, result, "tool")
+                return result
+
+    # Only the returned wrapper gets the function metadata (FastMCP builds
+    # schemas from it)
+    return functools.update_wrapper(wrapper, func)
 
 
 def instrument_resource(func: Callable[..., T], resource_uri: str) -> Callable[..., T]:
     """Instrument a resource function with OpenTelemetry tracing."""
     global _provider
 
-    # If telemetry is disabled, return the original function
-    if _provider is None:
+    # If telemetry is disabled or every span is dropped, return the original function
+    if _provider is None or _sampling_disabled:
         return func
 
-    tracer = get_tracer()
+    tracer = _tracer
 
     # Determine if this is a template based on URI pattern
     is_template = "{" in resource_uri
 
-    @functools.wraps(func)
-    async def async_wrapper(*args, **kwargs):
-        # Create a more descriptive span name
-        span_name = f"mcp.resource.{'template' if is_template else 'static'}.read"
-        with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive attributes
-            span.set_attribute("mcp.component.type", "resource")
-            span.set_attribute("mcp.component.name", resource_uri)
-            span.set_attribute("mcp.resource.uri", resource_uri)
-            span.set_attribute("mcp.resource.is_template", is_template)
-            span.set_attribute("mcp.resource.function", func.__name__)
-            span.set_attribute(
-                "mcp.resource.module",
-                func.__module__ if hasattr(func, "__module__") else "unknown",
-            )
-            span.set_attribute("mcp.execution.async", True)
-
-            # Extract Context parameter if present
-            ctx = kwargs.get("ctx")
-            if ctx:
-                # Only extract known MCP context attributes
-                ctx_attrs = [
-                    "request_id",
-                    "session_id",
-                    "client_id",
-                    "user_id",
-                    "tenant_id",
-                ]
-                for attr in ctx_attrs:
-                    if hasattr(ctx, attr):
-                        value = getattr(ctx, attr)
-                        if value is not None:
-                            span.set_attribute(f"mcp.context.{attr}", str(value))
-
-            # Also check baggage for session ID
-            session_id_from_baggage = baggage.get_baggage("mcp.session.id")
-            if session_id_from_baggage:
-                span.set_attribute("mcp.session.id", session_id_from_baggage)
-
-            # Add event for resource read start
-            span.add_event("resource.read.started", {"resource.uri": resource_uri})
+    # Precompute values that stay the same for every call
+    is_coro = inspect.iscoroutinefunction(func)
+    span_name = f"mcp.resource.{'template' if is_template else 'static'}.read"
+    error_event_attrs = {"resource.uri": resource_uri}
+    static_attrs = {
+        "mcp.component.type": "resource",
+        "mcp.component.name": resource_uri,
+        "mcp.resource.uri": resource_uri,
+        "mcp.resource.is_template": is_template,
+        "mcp.resource.function": func.__name__,
+        "mcp.resource.module": getattr(func, "__module__", "unknown"),
+        "mcp.execution.async": is_coro,
+    }
 
-            try:
-                result = await func(*args, **kwargs)
-                span.set_status(Status(StatusCode.OK))
+    # Only build the wrapper matching the function type
+    if is_coro:
 
-                # Add event for successful read
-                span.add_event(
-                    "resource.read.completed", {"resource.uri": resource_uri}
-                )
+        async def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return await func(*args, **kwargs)
 
-                # Add result metadata
-                if hasattr(result, "__len__"):
-                    span.set_attribute("mcp.resource.result.size", len(result))
-
-                # Determine content type if possible
-                if isinstance(result, str):
-                    span.set_attribute("mcp.resource.result.type", "text")
-                    span.set_attribute("mcp.resource.result.length", len(result))
-                elif isinstance(result, bytes):
-                    span.set_attribute("mcp.resource.result.type", "binary")
-                    span.set_attribute("mcp.resource.result.size_bytes", len(result))
-                elif isinstance(result, dict):
-                    span.set_attribute("mcp.resource.result.type", "object")
-                    span.set_attribute("mcp.resource.result.keys_count", len(result))
-                elif isinstance(result, list):
-                    span.set_attribute("mcp.resource.result.type", "array")
-                    span.set_attribute("mcp.resource.result.items_count", len(result))
+            with tracer.start_as_current_span(span_name) as span:
+                # Sampled-out spans discard attributes and events, skip building them
+                if not span.is_recording():
+                    return await func(*args, **kwargs)
 
+                _set_common_attrs(span, static_attrs, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    _record_error(span, e, _RESOURCE_ERROR_EVENT, error_event_attrs)
+                    raise
+                _record_result_meta(span, result, "resource")
                 return result
-            except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "resource.read.error",
-                    {
-                        "resource.uri": resource_uri,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
-                raise
-
-    @functools.wraps(func)
-    def sync_wrapper(*args, **kwargs):
-        # Create a more descriptive span name
-        span_name = f"mcp.resource.{'template' if is_template else 'static'}.read"
-        with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive attributes
-            span.set_attribute("mcp.component.type", "resource")
-            span.set_attribute("mcp.component.name", resource_uri)
-            span.set_attribute("mcp.resource.uri", resource_uri)
-            span.set_attribute("mcp.resource.is_template", is_template)
-            span.set_attribute("mcp.resource.function", func.__name__)
-            span.set_attribute(
-                "mcp.resource.module",
-                func.__module__ if hasattr(func, "__module__") else "unknown",
-            )
-            span.set_attribute("mcp.execution.async", False)
-
-            # Extract Context parameter if present
-            ctx = kwargs.get("ctx")
-            if ctx:
-                # Only extract known MCP context attributes
-                ctx_attrs = [
-                    "request_id",
-                    "session_id",
-                    "client_id",
-                    "user_id",
-                    "tenant_id",
-                ]
-                for attr in ctx_attrs:
-                    if hasattr(ctx, attr):
-                        value = getattr(ctx, attr)
-                        if value is not None:
-                            span.set_attribute(f"mcp.context.{attr}", str(value))
-
-            # Also check baggage for session ID
-            session_id_from_baggage = baggage.get_baggage("mcp.session.id")
-            if session_id_from_baggage:
-                span.set_attribute("mcp.session.id", session_id_from_baggage)
-
-            # Add event for resource read start
-            span.add_event("resource.read.started", {"resource.uri": resource_uri})
 
-            try:
-                result = func(*args, **kwargs)
-                span.set_status(Status(StatusCode.OK))
+    else:
 
-                # Add event for successful read
-                span.add_event(
-                    "resource.read.completed", {"resource.uri": resource_uri}
-                )
+        def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return func(*args, **kwargs)
 
-                # Add result metadata
-                if hasattr(result, "__len__"):
-                    span.set_attribute("mcp.resource.result.size", len(result))
-
-                # Determine content type if possible
-                if isinstance(result, str):
-                    span.set_attribute("mcp.resource.result.type", "text")
-                    span.set_attribute("mcp.resource.result.length", len(result))
-                elif isinstance(result, bytes):
-                    span.set_attribute("mcp.resource.result.type", "binary")
-                    span.set_attribute("mcp.resource.result.size_bytes", len(result))
-                elif isinstance(result, dict):
-                    span.set_attribute("mcp.resource.result.type", "object")
-                    span.set_attribute("mcp.resource.result.keys_count", len(result))
-                elif isinstance(result, list):
-                    span.set_attribute("mcp.resource.result.type", "array")
-                    span.set_attribute("mcp.resource.result.items_count", len(result))
+            with tracer.start_as_current_span(span_name) as span:
+                # Sampled-out spans discard attributes and events, skip building them
+                if not span.is_recording():
+                    return func(*args, **kwargs)
 
+                _set_common_attrs(span, static_attrs, kwargs)
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    _record_error(span, e, _RESOURCE_ERROR_EVENT, error_event_attrs)
+                    raise
+                _record_result_meta(span, result, "resource")
                 return result
-            except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "resource.read.error",
-                    {
-                        "resource.uri": resource_uri,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
-                raise
 
-    if asyncio.iscoroutinefunction(func):
-        return async_wrapper
-    else:
-        return sync_wrapper
+    return functools.update_wrapper(wrapper, func)
 
 
 def instrument_prompt(func: Callable[..., T], prompt_name: str) -> Callable[..., T]:
     """Instrument a prompt function with OpenTelemetry tracing."""
     global _provider
 
-    # If telemetry is disabled, return the original function
-    if _provider is None:
+    # If telemetry is disabled or every span is dropped, return the original function
+    if _provider is None or _sampling_disabled:
         return func
 
-    tracer = get_tracer()
-
-    @functools.wraps(func)
-    async def async_wrapper(*args, **kwargs):
-        # Create a more descriptive span name
-        span_name = f"mcp.prompt.{prompt_name}.generate"
-        with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive attributes
-            span.set_attribute("mcp.component.type", "prompt")
-            span.set_attribute("mcp.component.name", prompt_name)
-            span.set_attribute("mcp.prompt.name", prompt_name)
-            span.set_attribute("mcp.prompt.function", func.__name__)
-            span.set_attribute(
-                "mcp.prompt.module",
-                func.__module__ if hasattr(func, "__module__") else "unknown",
-            )
-            span.set_attribute("mcp.execution.async", True)
-
-            # Extract Context parameter if present
-            ctx = kwargs.get("ctx")
-            if ctx:
-                # Only extract known MCP context attributes
-                ctx_attrs = [
-                    "request_id",
-                    "session_id",
-                    "client_id",
-                    "user_id",
-                    "tenant_id",
-                ]
-                for attr in ctx_attrs:
-                    if hasattr(ctx, attr):
-                        value = getattr(ctx, attr)
-                        if value is not None:
-                            span.set_attribute(f"mcp.context.{attr}", str(value))
-
-            # Also check baggage for session ID
-            session_id_from_baggage = baggage.get_baggage("mcp.session.id")
-            if session_id_from_baggage:
-                span.set_attribute("mcp.session.id", session_id_from_baggage)
-
-            # Add event for prompt generation start
-            span.add_event("prompt.generation.started", {"prompt.name": prompt_name})
+    tracer = _tracer
+
+    # Precompute values that stay the same for every call
+    is_coro = inspect.iscoroutinefunction(func)
+    span_name = f"mcp.prompt.{prompt_name}.generate"
+    error_event_attrs = {"prompt.name": prompt_name}
+    static_attrs = {
+        "mcp.component.type": "prompt",
+        "mcp.component.name": prompt_name,
+        "mcp.prompt.name": prompt_name,
+        "mcp.prompt.function": func.__name__,
+        "mcp.prompt.module": getattr(func, "__module__", "unknown"),
+        "mcp.execution.async": is_coro,
+    }
 
-            try:
-                result = await func(*args, **kwargs)
-                span.set_status(Status(StatusCode.OK))
+    # Only build the wrapper matching the function type
+    if is_coro:
 
-                # Add event for successful generation
-                span.add_event(
-                    "prompt.generation.completed", {"prompt.name": prompt_name}
-                )
+        async def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return await func(*args, **kwargs)
 
-                # Add message count and type information
-                if isinstance(result, list):
-                    span.set_attribute("mcp.prompt.result.message_count", len(result))
-                    span.set_attribute("mcp.prompt.result.type", "message_list")
-
-                    # Analyze message types if they have role attributes
-                    roles = []
-                    for msg in result:
-                        if hasattr(msg, "role"):
-                            roles.append(msg.role)
-                        elif isinstance(msg, dict) and "role" in msg:
-                            roles.append(msg["role"])
-
-                    if roles:
-                        unique_roles = list(set(roles))
-                        span.set_attribute(
-                            "mcp.prompt.result.roles", ",".join(unique_roles)
-                        )
-                        span.set_attribute(
-                            "mcp.prompt.result.role_counts",
-                            str({role: roles.count(role) for role in unique_roles}),
-                        )
-                elif isinstance(result, str):
-                    span.set_attribute("mcp.prompt.result.type", "string")
-                    span.set_attribute("mcp.prompt.result.length", len(result))
-                else:
-                    span.set_attribute("mcp.prompt.result.type", type(result).__name__)
+            with tracer.start_as_current_span(span_name) as span:
+                # Sampled-out spans discard attributes and events, skip building them
+                if not span.is_recording():
+                    return await func(*args, **kwargs)
 
+                _set_common_attrs(span, static_attrs, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    _record_error(span, e, _PROMPT_ERROR_EVENT, error_event_attrs)
+                    raise
+                _record_result_meta(span, result, "prompt")
                 return result
-            except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "prompt.generation.error",
-                    {
-                        "prompt.name": prompt_name,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
-                raise
 
-    @functools.wraps(func)
-    def sync_wrapper(*args, **kwargs):
-        # Create a more descriptive span name
-        span_name = f"mcp.prompt.{prompt_name}.generate"
-        with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive attributes
-            span.set_attribute("mcp.component.type", "prompt")
-            span.set_attribute("mcp.component.name", prompt_name)
-            span.set_attribute("mcp.prompt.name", prompt_name)
-            span.set_attribute("mcp.prompt.function", func.__name__)
-            span.set_attribute(
-                "mcp.prompt.module",
-                func.__module__ if hasattr(func, "__module__") else "unknown",
-            )
-            span.set_attribute("mcp.execution.async", False)
-
-            # Extract Context parameter if present
-            ctx = kwargs.get("ctx")
-            if ctx:
-                # Only extract known MCP context attributes
-                ctx_attrs = [
-                    "request_id",
-                    "session_id",
-                    "client_id",
-                    "user_id",
-                    "tenant_id",
-                ]
-                for attr in ctx_attrs:
-                    if hasattr(ctx, attr):
-                        value = getattr(ctx, attr)
-                        if value is not None:
-                            span.set_attribute(f"mcp.context.{attr}", str(value))
-
-            # Also check baggage for session ID
-            session_id_from_baggage = baggage.get_baggage("mcp.session.id")
-            if session_id_from_baggage:
-                span.set_attribute("mcp.session.id", session_id_from_baggage)
-
-            # Add event for prompt generation start
-            span.add_event("prompt.generation.started", {"prompt.name": prompt_name})
+    else:
 
-            try:
-                result = func(*args, **kwargs)
-                span.set_status(Status(StatusCode.OK))
+        def wrapper(*args, **kwargs):
+            # Telemetry was shut down after this function was decorated
+            if _provider is None:
+                return func(*args, **kwargs)
 
-                # Add event for successful generation
-                span.add_event(
-                    "prompt.generation.completed", {"prompt.name": prompt_name}
-                )
-
-                # Add message count and type information
-                if isinstance(result, list):
-                    span.set_attribute("mcp.prompt.result.message_count", len(result))
-                    span.set_attribute("mcp.prompt.result.type", "message_list")
-
-                    # Analyze message types if they have role attributes
-                    roles = []
-                    for msg in result:
-                        if hasattr(msg, "role"):
-                            roles.append(msg.role)
-                        elif isinstance(msg, dict) and "role" in msg:
-                            roles.append(msg["role"])
-
-                    if roles:
-                        unique_roles = list(set(roles))
-                        span.set_attribute(
-                            "mcp.prompt.result.roles", ",".join(unique_roles)
-                        )
-                        span.set_attribute(
-                            "mcp.prompt.result.role_counts",
-                            str({role: roles.count(role) for role in unique_roles}),
-                        )
-                elif isinstance(result, str):
-                    span.set_attribute("mcp.prompt.result.type", "string")
-                    span.set_attribute("mcp.prompt.result.length", len(result))
-                else:
-                    span.set_attribute("mcp.prompt.result.type", type(result).__name__)
+            with tracer.start_as_current_span(span_name) as span:
+                # Sampled-out spans discard attributes and events, skip building them
+                if not span.is_recording():
+                    return func(*args, **kwargs)
 
+                _set_common_attrs(span, static_attrs, kwargs)
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    _record_error(span, e, _PROMPT_ERROR_EVENT, error_event_attrs)
+                    raise
+                _record_result_meta(span, result, "prompt")
                 return result
-            except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "prompt.generation.error",
-                    {
-                        "prompt.name": prompt_name,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
-                raise
 
-    if asyncio.iscoroutinefunction(func):
-        return async_wrapper
-    else:
-        return sync_wrapper
+    return functools.update_wrapper(wrapper, func)
+
+
+def _http_operation(path: str) -> str:
+    """Return the operation type for a request path, "unknown" if none matches."""
+    for marker, operation_type in _HTTP_OPERATIONS:
+        if marker in path:
+            return operation_type
+    return "unknown"
 
 
 # Add the BoundedSessionTracker class before SessionTracingMiddleware
 class BoundedSessionTracker:
-    """Memory-safe session tracker with automatic expiration."""
+    """Memory-safe LRU of active sessions with automatic expiration."""
 
-    def __init__(self, max_sessions: int = 1000, session_ttl: int = 3600):
+    def __init__(self, max_sessions: int = 10000, session_ttl: int = 3600):
         self.max_sessions = max_sessions
         self.session_ttl = session_ttl
-        self.sessions: OrderedDict[str, float] = OrderedDict()
-        self.last_cleanup = time.time()
-
-    def track_session(self, session_id: str) -> bool:
-        """Track a session, returns True if it's new."""
-        current_time = time.time()
+        self._ttl_ns = session_ttl * 1_000_000_000
+        # Session id -> (start time, last seen), in last-seen order
+        self.sessions: OrderedDict[str, tuple[int, int]] = OrderedDict()
 
-        # Periodic cleanup (every 5 minutes)
-        if current_time - self.last_cleanup > 300:
-            self._cleanup_expired(current_time)
-            self.last_cleanup = current_time
-
-        # Check if session exists and is still valid
-        if session_id in self.sessions:
-            # Move to end (mark as recently used)
-            self.sessions.move_to_end(session_id)
-            return False
+    def track_session(self, session_id: str, now: int) -> int | None:
+        """Track a session, returns its start time or None if it's new.
 
-        # New session
-        self.sessions[session_id] = current_time
+        Times are monotonic nanosecond timestamps. Sessions not seen for
+        ``session_ttl`` seconds expire.
+        """
+        sessions = self.sessions
 
-        # Enforce max size
-        while len(self.sessions) > self.max_sessions:
-            self.sessions.popitem(last=False)  # Remove oldest
+        # The least recently seen session is first, expire from the front
+        cutoff = now - self._ttl_ns
+        while sessions and next(iter(sessions.values()))[1] < cutoff:
+            sessions.popitem(last=False)
 
-        return True
+        entry = sessions.get(session_id)
+        if entry is not None:
+            # Move to end (mark as recently used)
+            sessions[session_id] = (entry[0], now)
+            sessions.move_to_end(session_id)
+            return entry[0]
 
-    def _cleanup_expired(self, current_time: float):
-        """Remove expired sessions."""
-        expired = [
-            sid
-            for sid, timestamp in self.sessions.items()
-            if current_time - timestamp > self.session_ttl
-        ]
-        for sid in expired:
-            del self.sessions[sid]
+        # New session, evict the least recently used one when full
+        sessions[session_id] = (now, now)
+        if len(sessions) > self.max_sessions:
+            sessions.popitem(last=False)
+        return None
 
     def get_active_session_count(self) -> int:
         return len(self.sessions)
 
 
 class SessionTracingMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
+    # BaseHTTPMiddleware keeps a __dict__ for app/dispatch_func, our own
+    # per-request state lives in slots
+    __slots__ = ("session_tracker", "max_metric_paths", "metric_paths")
+
+    def __init__(
+        self,
+        app,
+        max_sessions: int = 10000,
+        max_metric_paths: int = 100,
+        metric_paths: Iterable[str] = ("mcp", "mcp/", "sse", "sse/", "messages/"),
+    ):
         super().__init__(app)
         # Use memory-safe session tracker instead of unbounded collections
-        self.session_tracker = BoundedSessionTracker(
-            max_sessions=1000, session_ttl=3600
-        )
+        self.session_tracker = BoundedSessionTracker(max_sessions=max_sessions)
+        # Paths used as metric labels: the known endpoints plus paths learned from
+        # routed responses, later unseen paths are reported as "other"
+        self.max_metric_paths = max_metric_paths
+        self.metric_paths: set[str] = {self._clean_path(p) for p in metric_paths}
+
+    @staticmethod
+    def _clean_path(path: str) -> str:
+        """Strip the query string and leading slash from a request path."""
+        return path.partition("?")[0].lstrip("/") or "root"
+
+    def _metric_path(self, clean_path: str, status_code: int) -> str:
+        """Map a clean path to a bounded-cardinality metrics label.
+
+        Unknown paths are only learned from responses that matched a route, so
+        404s from scanners can't use up the label budget.
+        """
+        metric_paths = self.metric_paths
+        if clean_path in metric_paths:
+            return clean_path
+        if status_code != 404 and len(metric_paths) < self.max_metric_paths:
+            metric_paths.add(clean_path)
+            return clean_path
+        return "other"
 
     async def dispatch(self, request: Request, call_next):
-        # Record HTTP request timing
-        import time
+        # Telemetry disabled or shut down, pass the request straight through
+        if _provider is None:
+            return await call_next(request)
 
-        start_time = time.time()
+        # Record HTTP request timing
+        start_ns = time.monotonic_ns()
 
         # Extract session ID from query params or headers
         session_id = request.query_params.get("session_id")
@@ -911,162 +1156,139 @@ class SessionTracingMiddleware(BaseHTTPMiddleware):
             session_id = request.headers.get("x-session-id")
 
         # Track session metrics using memory-safe tracker
+        session_tracker = self.session_tracker
         if session_id:
-            is_new_session = self.session_tracker.track_session(session_id)
-
-            if is_new_session:
-                try:
-                    from golf.metrics import get_metrics_collector
+            session_start = session_tracker.track_session(session_id, start_ns)
 
-                    metrics_collector = get_metrics_collector()
-                    metrics_collector.increment_session()
-                except ImportError:
-                    pass
+            if session_start is None:
+                _queue_metric("increment_session")
             else:
                 # Record session duration for existing sessions
-                try:
-                    from golf.metrics import get_metrics_collector
-
-                    metrics_collector = get_metrics_collector()
-                    # Use a default duration since we don't track exact start times anymore
-                    # This is less precise but memory-safe
-                    metrics_collector.record_session_duration(300.0)  # 5 min default
-                except ImportError:
-                    pass
+                _queue_metric(
+                    "record_session_duration", (start_ns - session_start) / 1e9
+                )
 
         # Create a descriptive span name based on the request
         method = request.method
         path = request.url.path
+        clean_path = self._clean_path(path)
 
         # Determine the operation type from the path
-        operation_type = "unknown"
-        if "/mcp" in path:
-            operation_type = "mcp.request"
-        elif "/sse" in path:
-            operation_type = "sse.stream"
-        elif "/auth" in path:
-            operation_type = "auth"
+        operation_type = _http_operation(path)
+        method_name = _HTTP_METHOD_NAMES.get(method) or method.lower()
 
-        span_name = f"{operation_type}.{method.lower()}"
+        span_name = f"{operation_type}.{method_name}"
 
         tracer = get_tracer()
         with tracer.start_as_current_span(span_name) as span:
-            # Add comprehensive HTTP attributes
-            span.set_attribute("http.method", method)
-            span.set_attribute("http.url", str(request.url))
-            span.set_attribute("http.scheme", request.url.scheme)
-            span.set_attribute("http.host", request.url.hostname or "unknown")
-            span.set_attribute("http.target", path)
-            span.set_attribute(
-                "http.user_agent", request.headers.get("user-agent", "unknown")
-            )
+            # Sampled-out spans discard attributes and events, skip building them
+            recording = span.is_recording()
+
+            if recording:
+                # Add comprehensive HTTP attributes, set in a single batch
+                url = request.url
+                headers = request.headers
+                request_attrs = {
+                    "http.method": method,
+                    "http.scheme": url.scheme,
+                    "http.host": url.hostname or "unknown",
+                    "http.target": path,
+                    "http.user_agent": headers.get("user-agent", "unknown"),
+                }
+                if _TRACE_FULL_URL:
+                    request_attrs["http.url"] = str(url)[:_VALUE_PREVIEW_MAX_LEN]
+
+                # Add session tracking
+                if session_id:
+                    request_attrs["mcp.session.id"] = session_id
+                    request_attrs["mcp.session.active_count"] = (
+                        session_tracker.get_active_session_count()
+                    )
 
-            # Add session tracking
-            if session_id:
-                span.set_attribute("mcp.session.id", session_id)
-                span.set_attribute(
-                    "mcp.session.active_count",
-                    self.session_tracker.get_active_session_count(),
-                )
-                # Add to baggage for propagation
-                ctx = baggage.set_baggage("mcp.session.id", session_id)
-                from opentelemetry import context
+                # Add request size if available
+                content_length = headers.get("content-length")
+                if content_length:
+                    request_attrs["http.request.size"] = int(content_length)
+
+                span.set_attributes(request_attrs)
 
+                # Add event for request start
+                span.add_event(_HTTP_STARTED_EVENT, {"method": method, "path": path})
+
+            # Add to baggage for propagation, component spans may still be sampled.
+            # Skip the context switch when upstream already propagated it.
+            if session_id and _get_baggage("mcp.session.id") != session_id:
+                ctx = baggage.set_baggage("mcp.session.id", session_id)
                 token = context.attach(ctx)
             else:
                 token = None
 
-            # Add request size if available
-            content_length = request.headers.get("content-length")
-            if content_length:
-                span.set_attribute("http.request.size", int(content_length))
-
-            # Add event for request start
-            span.add_event("http.request.started", {"method": method, "path": path})
-
             try:
                 response = await call_next(request)
+                status_code = response.status_code
+
+                if recording:
+                    # Add response attributes
+                    span.set_attributes(
+                        {
+                            "http.status_code": status_code,
+                            "http.status_class": f"{status_code // 100}xx",
+                        }
+                    )
 
-                # Add response attributes
-                span.set_attribute("http.status_code", response.status_code)
-                span.set_attribute(
-                    "http.status_class", f"{response.status_code // 100}xx"
-                )
-
-                # Set span status based on HTTP status
-                if response.status_code >= 400:
-                    span.set_status(
-                        Status(StatusCode.ERROR, f"HTTP {response.status_code}")
+                    # Set span status based on HTTP status
+                    if status_code >= 400:
+                        span.set_status(Status(StatusCode.ERROR, f"HTTP {status_code}"))
+                    else:
+                        span.set_status(Status(StatusCode.OK))
+
+                    # Add event for request completion
+                    span.add_event(
+                        _HTTP_COMPLETED_EVENT,
+                        {
+                            "method": method,
+                            "path": path,
+                            "status_code": status_code,
+                        },
                     )
-                else:
-                    span.set_status(Status(StatusCode.OK))
-
-                # Add event for request completion
-                span.add_event(
-                    "http.request.completed",
-                    {
-                        "method": method,
-                        "path": path,
-                        "status_code": response.status_code,
-                    },
-                )
 
                 # Record HTTP request metrics
-                try:
-                    from golf.metrics import get_metrics_collector
-
-                    metrics_collector = get_metrics_collector()
-
-                    # Clean up path for metrics (remove query params, normalize)
-                    clean_path = path.split("?")[0]  # Remove query parameters
-                    if clean_path.startswith("/"):
-                        clean_path = (
-                            clean_path[1:] or "root"
-                        )  # Remove leading slash, handle root
-
-                    metrics_collector.increment_http_request(
-                        method, response.status_code, clean_path
-                    )
-                    metrics_collector.record_http_duration(
-                        method, clean_path, time.time() - start_time
-                    )
-                except ImportError:
-                    # Metrics not available, continue without metrics
-                    pass
+                metric_path = self._metric_path(clean_path, status_code)
+                _queue_metric(
+                    "increment_http_request", method, status_code, metric_path
+                )
+                _queue_metric(
+                    "record_http_duration",
+                    method,
+                    metric_path,
+                    (time.monotonic_ns() - start_ns) / 1e9,
+                )
 
                 return response
             except Exception as e:
-                span.record_exception(e)
-                span.set_status(Status(StatusCode.ERROR, str(e)))
-
-                # Add event for error
-                span.add_event(
-                    "http.request.error",
-                    {
-                        "method": method,
-                        "path": path,
-                        "error.type": type(e).__name__,
-                        "error.message": str(e),
-                    },
-                )
+                if recording:
+                    span.record_exception(e)
+                    span.set_status(Status(StatusCode.ERROR, str(e)))
+
+                    # Add event for error
+                    span.add_event(
+                        _HTTP_ERROR_EVENT,
+                        {
+                            "method": method,
+                            "path": path,
+                            "error.type": type(e).__name__,
+                            "error.message": str(e),
+                        },
+                    )
 
                 # Record HTTP error metrics
-                try:
-                    from golf.metrics import get_metrics_collector
-
-                    metrics_collector = get_metrics_collector()
-
-                    # Clean up path for metrics
-                    clean_path = path.split("?")[0]
-                    if clean_path.startswith("/"):
-                        clean_path = clean_path[1:] or "root"
-
-                    metrics_collector.increment_http_request(
-                        method, 500, clean_path
-                    )  # Assume 500 for exceptions
-                    metrics_collector.increment_error("http", type(e).__name__)
-                except ImportError:
-                    pass
+                _queue_metric(
+                    "increment_http_request",
+                    method,
+                    500,
+                    self._metric_path(clean_path, 500),
+                )  # Assume 500 for exceptions
+                _queue_metric("increment_error", "http", type(e).__name__)
 
                 raise
             finally:
@@ -1077,10 +1299,15 @@ class SessionTracingMiddleware(BaseHTTPMiddleware):
 @asynccontextmanager
 async def telemetry_lifespan(mcp_instance):
     """Simplified lifespan for telemetry initialization and cleanup."""
-    global _provider
+    global _tracer, _provider, _sampling_disabled
+    global _lifespan_provider, _lifespan_sessions
 
-    # Initialize telemetry with the server name
-    provider = init_telemetry(service_name=mcp_instance.name)
+    # FastMCP enters the lifespan once per session, reuse an existing provider
+    provider = _provider
+    if provider is None:
+        # Initialize telemetry with the server name
+        provider = init_telemetry(service_name=mcp_instance.name)
+        _lifespan_provider = provider
 
     # If provider is None, telemetry is disabled
     if provider is None:
@@ -1108,6 +1335,14 @@ async def telemetry_lifespan(mcp_instance):
             original_handle_request = mcp_instance.handle_request
 
             async def traced_handle_request(*args, **kwargs):
+                # Inside the middleware span, annotate it instead of nesting
+                # another span with its own context switch
+                current = trace.get_current_span()
+                if current.get_span_context().is_valid:
+                    if current.is_recording():
+                        current.set_attribute("mcp.request.handler", "handle_request")
+                    return await original_handle_request(*args, **kwargs)
+
                 tracer = get_tracer()
                 with tracer.start_as_current_span("mcp.handle_request") as span:
                     span.set_attribute("mcp.request.handler", "handle_request")
@@ -1121,12 +1356,28 @@ async def telemetry_lifespan(mcp_instance):
 
         traceback.print_exc()
 
+    # Record request metrics off the request path, one worker for all sessions
+    _lifespan_sessions += 1
+    _start_metrics_worker()
+
     try:
         # Yield control back to FastMCP
         yield
     finally:
-        # Cleanup - shutdown the provider
-        if _provider and hasattr(_provider, "shutdown"):
+        _lifespan_sessions -= 1
+
+        if _lifespan_sessions == 0:
+            await _stop_metrics_worker()
+
+        # Cleanup - shutdown the provider once no session is using it
+        if (
+            _lifespan_sessions == 0
+            and _lifespan_provider is not None
+            and _lifespan_provider is _provider
+        ):
+            _lifespan_provider = None
             _provider.force_flush()
             _provider.shutdown()
             _provider = None
+            _tracer = None
+            _sampling_disabled = False